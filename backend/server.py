@@ -1,33 +1,74 @@
-from fastapi import FastAPI, APIRouter, HTTPException, status
+from fastapi import FastAPI, APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
+import asyncio
+import uvloop
+import hashlib
 import os
 import logging
+import time
+import orjson
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
 from typing import List, Optional
 import uuid
 from datetime import datetime, timezone
-from passlib.context import CryptContext
+import bcrypt
+import msgspec
 import jwt
 from jwt import PyJWTError
+from pymongo.errors import DuplicateKeyError
+from slowapi import Limiter, _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+from slowapi.util import get_remote_address
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+uvloop.install()
+
+# MongoDB connection; pool sized above expected concurrency so bursts
+# queue in the pool instead of stalling on new TCP+TLS handshakes
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '200'))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '20'))
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncMongoClient(
+    mongo_url,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=60000,
+    waitQueueTimeoutMS=5000
+)
 db = client[os.environ['DB_NAME']]
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
 SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-production')
 ALGORITHM = "HS256"
 
+# In-process TTL cache for rarely-changing catalog responses (serialized bytes)
+CATALOG_CACHE_TTL = float(os.environ.get('CATALOG_CACHE_TTL', '60'))
+# Categories only change when the menu does, so they can live much longer
+CATEGORY_CACHE_TTL = float(os.environ.get('CATEGORY_CACHE_TTL', '300'))
+# Lets CDNs and browsers revalidate with a 304 instead of refetching
+CATALOG_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+# Hard bound on entries so attacker-chosen cache keys can't grow memory
+CATALOG_CACHE_MAXSIZE = int(os.environ.get('CATALOG_CACHE_MAXSIZE', '32'))
+_catalog_cache = {}
+
+# Cap the bcrypt-backed auth endpoints per client IP so credential
+# stuffing gets a cheap 429 before any Mongo lookup or KDF work
+AUTH_RATE_LIMIT = os.environ.get('AUTH_RATE_LIMIT', '10/minute')
+MAX_TOKEN_LENGTH = 4096
+MAX_BODY_SIZE = int(os.environ.get('MAX_BODY_SIZE', str(1024 * 1024)))
+limiter = Limiter(key_func=get_remote_address)
+
 # Create the main app
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
+app.state.limiter = limiter
+app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 api_router = APIRouter(prefix="/api")
 
 # ============ MODELS ============
@@ -63,7 +104,7 @@ class FoodItem(BaseModel):
     restaurant: str
     available: bool = True
 
-class CartItem(BaseModel):
+class CartItem(msgspec.Struct):
     id: str
     name: str
     price: float
@@ -81,19 +122,19 @@ class Coupon(BaseModel):
     valid_until: str
     active: bool = True
 
-class CouponCreate(BaseModel):
+class CouponCreate(msgspec.Struct):
     code: str
     discount_type: str
     discount_value: float
     min_order_value: float
-    max_discount: Optional[float] = None
     valid_until: str
+    max_discount: Optional[float] = None
 
 class CouponValidate(BaseModel):
     code: str
     order_total: float
 
-class OrderCreate(BaseModel):
+class OrderCreate(msgspec.Struct):
     items: List[CartItem]
     total: float
     payment_method: str
@@ -115,7 +156,7 @@ class Order(BaseModel):
     status: str = "Placed"
     delivery_person_id: Optional[str] = None
     delivery_person_name: Optional[str] = None
-    timestamp: str
+    timestamp: datetime
     rating: Optional[int] = None
     review: Optional[str] = None
 
@@ -129,13 +170,92 @@ class OrderReview(BaseModel):
     rating: int
     review: str
 
+# Decoders bound to a fixed type at import time; msgspec specializes the
+# parser once instead of dispatching per request
+ORDER_DECODER = msgspec.json.Decoder(OrderCreate)
+COUPON_DECODER = msgspec.json.Decoder(CouponCreate)
+
 # ============ HELPER FUNCTIONS ============
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+
+# Verified against when the email is unknown, so login burns the same
+# bcrypt cost either way and can't leak which addresses are registered
+DUMMY_HASH = hash_password("not-a-real-password")
+
+def cache_get(key: str):
+    entry = _catalog_cache.get(key)
+    if entry is None:
+        return None
+    if entry[0] <= time.monotonic():
+        del _catalog_cache[key]
+        return None
+    return entry[1], entry[2]
+
+def cache_set(key: str, payload: bytes, ttl: float = CATALOG_CACHE_TTL):
+    now = time.monotonic()
+    for stale in [k for k, entry in _catalog_cache.items() if entry[0] <= now]:
+        del _catalog_cache[stale]
+    if key not in _catalog_cache and len(_catalog_cache) >= CATALOG_CACHE_MAXSIZE:
+        # Evict the entry closest to expiry to make room
+        del _catalog_cache[min(_catalog_cache, key=lambda k: _catalog_cache[k][0])]
+    # RFC 7232 entity-tags are quoted strings
+    etag = f'"{hashlib.md5(payload).hexdigest()}"'
+    _catalog_cache[key] = (now + ttl, payload, etag)
+    return payload, etag
+
+def catalog_response(request: Request, payload: bytes, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match", "")
+    # If-None-Match may carry several tags, possibly weak-prefixed
+    client_tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if etag in client_tags or "*" in client_tags:
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
+
+def cache_clear(prefix: str):
+    for key in [k for k in _catalog_cache if k.startswith(prefix)]:
+        del _catalog_cache[key]
+
+async def refresh_categories_cache():
+    categories = await db.food_items.distinct("category")
+    payload = orjson.dumps({"categories": ["All"] + sorted(categories)})
+    return cache_set("categories", payload, ttl=CATEGORY_CACHE_TTL)
+
+async def stream_json_array(cursor):
+    # Emit a JSON array incrementally so bytes flow while Mongo is still yielding
+    yield b"["
+    first = True
+    async for doc in cursor:
+        yield (b"" if first else b",") + orjson.dumps(doc)
+        first = False
+    yield b"]"
+
+async def read_body(request: Request) -> bytes:
+    # Reject oversize payloads before buffering or decoding them
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_BODY_SIZE:
+        raise HTTPException(status_code=413, detail="Request body too large")
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_BODY_SIZE:
+            raise HTTPException(status_code=413, detail="Request body too large")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def decode_body(body: bytes, decoder: msgspec.json.Decoder):
+    try:
+        return decoder.decode(body)
+    except msgspec.ValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except msgspec.DecodeError:
+        raise HTTPException(status_code=422, detail="Invalid JSON body")
 
 def create_token(user_id: str, email: str, user_type: str) -> str:
     payload = {"user_id": user_id, "email": email, "user_type": user_type}
@@ -147,49 +267,74 @@ def decode_token(token: str) -> dict:
     except PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+async def get_current_user(authorization: str = Header(...)) -> dict:
+    if len(authorization) > MAX_TOKEN_LENGTH:
+        raise HTTPException(status_code=431, detail="Authorization header too large")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Invalid authorization header")
+    return decode_token(token)
+
 # ============ SEED DATA ============
 
+# Built once at import time; deterministic ids keep re-seeding idempotent
+FOOD_SEED = (
+    {"id": "seed-food-1", "name": "Margherita Pizza", "category": "Pizza", "price": 12.99, "image": "https://images.unsplash.com/photo-1604068549290-dea0e4a305ca?w=400&h=300&fit=crop", "description": "Classic tomato and mozzarella", "restaurant": "Italian Corner", "available": True},
+    {"id": "seed-food-2", "name": "Chicken Burger", "category": "Burgers", "price": 9.99, "image": "https://images.unsplash.com/photo-1586190848861-99aa4a171e90?w=400&h=300&fit=crop", "description": "Grilled chicken with lettuce", "restaurant": "Burger Palace", "available": True},
+    {"id": "seed-food-3", "name": "Caesar Salad", "category": "Salads", "price": 7.99, "image": "https://images.unsplash.com/photo-1550304943-4f24f54ddde9?w=400&h=300&fit=crop", "description": "Fresh romaine with parmesan", "restaurant": "Green Bowl", "available": True},
+    {"id": "seed-food-4", "name": "Pepperoni Pizza", "category": "Pizza", "price": 14.99, "image": "https://images.unsplash.com/photo-1628840042765-356cda07504e?w=400&h=300&fit=crop", "description": "Loaded with pepperoni", "restaurant": "Italian Corner", "available": True},
+    {"id": "seed-food-5", "name": "Veggie Burger", "category": "Burgers", "price": 8.99, "image": "https://images.unsplash.com/photo-1525059696034-4967a729002a?w=400&h=300&fit=crop", "description": "Plant-based patty", "restaurant": "Burger Palace", "available": True},
+    {"id": "seed-food-6", "name": "Greek Salad", "category": "Salads", "price": 8.99, "image": "https://images.unsplash.com/photo-1540189549336-e6e99c3679fe?w=400&h=300&fit=crop", "description": "Feta, olives, and cucumbers", "restaurant": "Green Bowl", "available": True},
+    {"id": "seed-food-7", "name": "Pad Thai", "category": "Asian", "price": 11.99, "image": "https://images.unsplash.com/photo-1559314809-0d155014e29e?w=400&h=300&fit=crop", "description": "Traditional Thai noodles", "restaurant": "Thai Express", "available": True},
+    {"id": "seed-food-8", "name": "Sushi Platter", "category": "Asian", "price": 16.99, "image": "https://images.unsplash.com/photo-1579584425555-c3ce17fd4351?w=400&h=300&fit=crop", "description": "Assorted sushi rolls", "restaurant": "Sushi Master", "available": True},
+    {"id": "seed-food-9", "name": "BBQ Ribs", "category": "BBQ", "price": 15.99, "image": "https://images.unsplash.com/photo-1544025162-d76694265947?w=400&h=300&fit=crop", "description": "Tender ribs with BBQ sauce", "restaurant": "Grill House", "available": True},
+    {"id": "seed-food-10", "name": "Chicken Tikka", "category": "Asian", "price": 13.99, "image": "https://images.unsplash.com/photo-1599487488170-d11ec9c172f0?w=400&h=300&fit=crop", "description": "Spicy Indian chicken", "restaurant": "Curry House", "available": True},
+    {"id": "seed-food-11", "name": "Pasta Carbonara", "category": "Italian", "price": 11.99, "image": "https://images.unsplash.com/photo-1612874742237-6526221588e3?w=400&h=300&fit=crop", "description": "Creamy pasta with bacon", "restaurant": "Italian Corner", "available": True},
+    {"id": "seed-food-12", "name": "Fresh Fruit Bowl", "category": "Salads", "price": 6.99, "image": "https://images.unsplash.com/photo-1564093497595-593b96d80180?w=400&h=300&fit=crop", "description": "Mixed seasonal fruits", "restaurant": "Green Bowl", "available": True},
+)
+
+COUPON_SEED = (
+    {"id": "seed-coupon-1", "code": "WELCOME10", "discount_type": "percentage", "discount_value": 10, "min_order_value": 15, "max_discount": 5, "valid_until": "2026-12-31", "active": True},
+    {"id": "seed-coupon-2", "code": "SAVE5", "discount_type": "fixed", "discount_value": 5, "min_order_value": 20, "max_discount": None, "valid_until": "2026-12-31", "active": True},
+    {"id": "seed-coupon-3", "code": "FIRSTORDER", "discount_type": "percentage", "discount_value": 15, "min_order_value": 25, "max_discount": 10, "valid_until": "2026-12-31", "active": True},
+)
+
+async def ensure_indexes():
+    await db.users.create_index("email", unique=True)
+    await db.users.create_index("id", unique=True)
+    await db.users.create_index("user_type")
+    await db.orders.create_index([("customer_id", 1), ("timestamp", -1)])
+    await db.orders.create_index([("delivery_person_id", 1), ("timestamp", -1)])
+    await db.orders.create_index("id", unique=True)
+    await db.orders.create_index([("status", 1), ("timestamp", -1)])
+    await db.coupons.create_index([("code", 1), ("active", 1)])
+    await db.food_items.create_index([("available", 1), ("category", 1)])
+
 async def seed_data():
-    # Check if food items exist
-    count = await db.food_items.count_documents({})
-    if count == 0:
-        food_items = [
-            {"id": str(uuid.uuid4()), "name": "Margherita Pizza", "category": "Pizza", "price": 12.99, "image": "https://images.unsplash.com/photo-1604068549290-dea0e4a305ca?w=400&h=300&fit=crop", "description": "Classic tomato and mozzarella", "restaurant": "Italian Corner", "available": True},
-            {"id": str(uuid.uuid4()), "name": "Chicken Burger", "category": "Burgers", "price": 9.99, "image": "https://images.unsplash.com/photo-1586190848861-99aa4a171e90?w=400&h=300&fit=crop", "description": "Grilled chicken with lettuce", "restaurant": "Burger Palace", "available": True},
-            {"id": str(uuid.uuid4()), "name": "Caesar Salad", "category": "Salads", "price": 7.99, "image": "https://images.unsplash.com/photo-1550304943-4f24f54ddde9?w=400&h=300&fit=crop", "description": "Fresh romaine with parmesan", "restaurant": "Green Bowl", "available": True},
-            {"id": str(uuid.uuid4()), "name": "Pepperoni Pizza", "category": "Pizza", "price": 14.99, "image": "https://images.unsplash.com/photo-1628840042765-356cda07504e?w=400&h=300&fit=crop", "description": "Loaded with pepperoni", "restaurant": "Italian Corner", "available": True},
-            {"id": str(uuid.uuid4()), "name": "Veggie Burger", "category": "Burgers", "price": 8.99, "image": "https://images.unsplash.com/photo-1525059696034-4967a729002a?w=400&h=300&fit=crop", "description": "Plant-based patty", "restaurant": "Burger Palace", "available": True},
-            {"id": str(uuid.uuid4()), "name": "Greek Salad", "category": "Salads", "price": 8.99, "image": "https://images.unsplash.com/photo-1540189549336-e6e99c3679fe?w=400&h=300&fit=crop", "description": "Feta, olives, and cucumbers", "restaurant": "Green Bowl", "available": True},
-            {"id": str(uuid.uuid4()), "name": "Pad Thai", "category": "Asian", "price": 11.99, "image": "https://images.unsplash.com/photo-1559314809-0d155014e29e?w=400&h=300&fit=crop", "description": "Traditional Thai noodles", "restaurant": "Thai Express", "available": True},
-            {"id": str(uuid.uuid4()), "name": "Sushi Platter", "category": "Asian", "price": 16.99, "image": "https://images.unsplash.com/photo-1579584425555-c3ce17fd4351?w=400&h=300&fit=crop", "description": "Assorted sushi rolls", "restaurant": "Sushi Master", "available": True},
-            {"id": str(uuid.uuid4()), "name": "BBQ Ribs", "category": "BBQ", "price": 15.99, "image": "https://images.unsplash.com/photo-1544025162-d76694265947?w=400&h=300&fit=crop", "description": "Tender ribs with BBQ sauce", "restaurant": "Grill House", "available": True},
-            {"id": str(uuid.uuid4()), "name": "Chicken Tikka", "category": "Asian", "price": 13.99, "image": "https://images.unsplash.com/photo-1599487488170-d11ec9c172f0?w=400&h=300&fit=crop", "description": "Spicy Indian chicken", "restaurant": "Curry House", "available": True},
-            {"id": str(uuid.uuid4()), "name": "Pasta Carbonara", "category": "Italian", "price": 11.99, "image": "https://images.unsplash.com/photo-1612874742237-6526221588e3?w=400&h=300&fit=crop", "description": "Creamy pasta with bacon", "restaurant": "Italian Corner", "available": True},
-            {"id": str(uuid.uuid4()), "name": "Fresh Fruit Bowl", "category": "Salads", "price": 6.99, "image": "https://images.unsplash.com/photo-1564093497595-593b96d80180?w=400&h=300&fit=crop", "description": "Mixed seasonal fruits", "restaurant": "Green Bowl", "available": True},
-        ]
-        await db.food_items.insert_many(food_items)
-    
+    # Check both collections in one round-trip window
+    food_count, coupon_count = await asyncio.gather(
+        db.food_items.count_documents({}),
+        db.coupons.count_documents({})
+    )
+
+    inserts = []
+    if food_count == 0:
+        inserts.append(db.food_items.insert_many([dict(item) for item in FOOD_SEED]))
+
     # Seed some coupons
-    coupon_count = await db.coupons.count_documents({})
     if coupon_count == 0:
-        coupons = [
-            {"id": str(uuid.uuid4()), "code": "WELCOME10", "discount_type": "percentage", "discount_value": 10, "min_order_value": 15, "max_discount": 5, "valid_until": "2026-12-31", "active": True},
-            {"id": str(uuid.uuid4()), "code": "SAVE5", "discount_type": "fixed", "discount_value": 5, "min_order_value": 20, "max_discount": None, "valid_until": "2026-12-31", "active": True},
-            {"id": str(uuid.uuid4()), "code": "FIRSTORDER", "discount_type": "percentage", "discount_value": 15, "min_order_value": 25, "max_discount": 10, "valid_until": "2026-12-31", "active": True},
-        ]
-        await db.coupons.insert_many(coupons)
+        inserts.append(db.coupons.insert_many([dict(coupon) for coupon in COUPON_SEED]))
+
+    if inserts:
+        await asyncio.gather(*inserts)
 
 # ============ AUTH ROUTES ============
 
-@api_router.post("/auth/register", response_model=User)
-async def register(user_data: UserRegister):
-    # Check if user exists
-    existing = await db.users.find_one({"email": user_data.email}, {"_id": 0})
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
+@api_router.post("/auth/register")
+@limiter.limit(AUTH_RATE_LIMIT)
+async def register(request: Request, user_data: UserRegister):
     user_id = str(uuid.uuid4())
-    hashed_pwd = hash_password(user_data.password)
+    hashed_pwd = await asyncio.to_thread(hash_password, user_data.password)
     
     user_doc = {
         "id": user_id,
@@ -202,39 +347,68 @@ async def register(user_data: UserRegister):
         "is_available": True
     }
     
-    await db.users.insert_one(user_doc)
-    
-    return User(**{k: v for k, v in user_doc.items() if k != "password"})
+    # The unique index on email makes this race-free in a single round-trip
+    try:
+        await db.users.insert_one(user_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    # Build the response from the request fields; the hash never leaves user_doc
+    return User.model_construct(
+        id=user_id,
+        name=user_data.name,
+        email=user_data.email,
+        user_type=user_data.user_type,
+        phone=None,
+        address=None,
+        is_available=True
+    )
 
 @api_router.post("/auth/login")
-async def login(credentials: UserLogin):
+@limiter.limit(AUTH_RATE_LIMIT)
+async def login(request: Request, credentials: UserLogin):
     user = await db.users.find_one({"email": credentials.email}, {"_id": 0})
-    
-    if not user or not verify_password(credentials.password, user["password"]):
+
+    if not user:
+        await asyncio.to_thread(verify_password, credentials.password, DUMMY_HASH)
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    
+
+    # pop() removes the hash in place — no per-request dict copy, and the
+    # doc handed to the response can never contain it by construction
+    hashed_pwd = user.pop("password")
+    if not await asyncio.to_thread(verify_password, credentials.password, hashed_pwd):
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
     token = create_token(user["id"], user["email"], user["user_type"])
-    
+
     return {
         "token": token,
-        "user": User(**{k: v for k, v in user.items() if k != "password"})
+        "user": User.model_construct(**user)
     }
 
 # ============ FOOD ROUTES ============
 
-@api_router.get("/food/items", response_model=List[FoodItem])
-async def get_food_items(category: Optional[str] = None):
-    query = {"available": True}
-    if category and category != "All":
-        query["category"] = category
-    
-    items = await db.food_items.find(query, {"_id": 0}).to_list(1000)
-    return items
+@api_router.get("/food/items")
+async def get_food_items(request: Request, category: Optional[str] = None):
+    cache_key = f"food_items:{category or 'All'}"
+    cached = cache_get(cache_key)
+    if cached is None:
+        query = {"available": True}
+        if category and category != "All":
+            query["category"] = category
+
+        items = await db.food_items.find(query, {"_id": 0}).to_list(1000)
+        cached = cache_set(cache_key, orjson.dumps(items))
+    payload, etag = cached
+    return catalog_response(request, payload, etag)
 
 @api_router.get("/food/categories")
-async def get_categories():
-    categories = await db.food_items.distinct("category")
-    return {"categories": ["All"] + sorted(categories)}
+async def get_categories(request: Request):
+    cached = cache_get("categories")
+    if cached is None:
+        cached = await refresh_categories_cache()
+    payload, etag = cached
+    return catalog_response(request, payload, etag)
 
 # ============ COUPON ROUTES ============
 
@@ -267,13 +441,18 @@ async def validate_coupon(data: CouponValidate):
         "coupon": coupon
     }
 
-@api_router.get("/coupons", response_model=List[Coupon])
-async def get_coupons():
-    coupons = await db.coupons.find({"active": True}, {"_id": 0}).to_list(1000)
-    return coupons
-
-@api_router.post("/coupons/create", response_model=Coupon)
-async def create_coupon(coupon_data: CouponCreate):
+@api_router.get("/coupons")
+async def get_coupons(request: Request):
+    cached = cache_get("coupons")
+    if cached is None:
+        coupons = await db.coupons.find({"active": True}, {"_id": 0}).to_list(1000)
+        cached = cache_set("coupons", orjson.dumps(coupons))
+    payload, etag = cached
+    return catalog_response(request, payload, etag)
+
+@api_router.post("/coupons/create")
+async def create_coupon(request: Request):
+    coupon_data = decode_body(await read_body(request), COUPON_DECODER)
     coupon_id = str(uuid.uuid4())
     coupon_doc = {
         "id": coupon_id,
@@ -287,55 +466,54 @@ async def create_coupon(coupon_data: CouponCreate):
     }
     
     await db.coupons.insert_one(coupon_doc)
-    return Coupon(**coupon_doc)
+    cache_clear("coupons")
+    return Coupon.model_construct(**coupon_doc)
 
 # ============ ORDER ROUTES ============
 
-@api_router.post("/orders/create", response_model=Order)
-async def create_order(order_data: OrderCreate, token: str):
-    try:
-        payload = decode_token(token)
-        user_id = payload["user_id"]
-        
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        order_id = str(uuid.uuid4())
-        order_doc = {
-            "id": order_id,
-            "customer_id": user_id,
-            "customer_name": user["name"],
-            "items": [item.model_dump() for item in order_data.items],
-            "total": order_data.total,
-            "payment_method": order_data.payment_method,
-            "delivery_address": order_data.delivery_address,
-            "coupon_code": order_data.coupon_code,
-            "discount_amount": order_data.discount_amount,
-            "status": "Placed",
-            "delivery_person_id": None,
-            "delivery_person_name": None,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "rating": None,
-            "review": None
-        }
-        
-        await db.orders.insert_one(order_doc)
-        return Order(**order_doc)
-    except:
+@api_router.post("/orders/create")
+async def create_order(request: Request, payload: dict = Depends(get_current_user)):
+    order_data = decode_body(await read_body(request), ORDER_DECODER)
+    user_id = payload.get("user_id")
+    if not user_id:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-@api_router.get("/orders/my-orders", response_model=List[Order])
-async def get_my_orders(token: str):
-    payload = decode_token(token)
+    user = await db.users.find_one({"id": user_id}, {"_id": 0, "name": 1})
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    order_id = str(uuid.uuid4())
+    order_doc = {
+        "id": order_id,
+        "customer_id": user_id,
+        "customer_name": user["name"],
+        "items": msgspec.to_builtins(order_data.items),
+        "total": order_data.total,
+        "payment_method": order_data.payment_method,
+        "delivery_address": order_data.delivery_address,
+        "coupon_code": order_data.coupon_code,
+        "discount_amount": order_data.discount_amount,
+        "status": "Placed",
+        "delivery_person_id": None,
+        "delivery_person_name": None,
+        "timestamp": datetime.now(timezone.utc),
+        "rating": None,
+        "review": None
+    }
+
+    await db.orders.insert_one(order_doc)
+    return Order.model_construct(**order_doc)
+
+@api_router.get("/orders/my-orders")
+async def get_my_orders(payload: dict = Depends(get_current_user)):
     user_id = payload["user_id"]
     
-    orders = await db.orders.find(
+    cursor = db.orders.find(
         {"customer_id": user_id},
-        {"_id": 0}
-    ).sort("timestamp", -1).to_list(1000)
-    
-    return orders
+        {"_id": 0, "items": 0}
+    ).sort("timestamp", -1)
+
+    return StreamingResponse(stream_json_array(cursor), media_type="application/json")
 
 @api_router.get("/orders/{order_id}", response_model=Order)
 async def get_order(order_id: str):
@@ -345,9 +523,7 @@ async def get_order(order_id: str):
     return order
 
 @api_router.post("/orders/{order_id}/review")
-async def add_review(order_id: str, review_data: OrderReview, token: str):
-    payload = decode_token(token)
-    
+async def add_review(order_id: str, review_data: OrderReview, payload: dict = Depends(get_current_user)):
     result = await db.orders.update_one(
         {"id": order_id},
         {"$set": {"rating": review_data.rating, "review": review_data.review}}
@@ -360,9 +536,8 @@ async def add_review(order_id: str, review_data: OrderReview, token: str):
 
 # ============ ADMIN ROUTES ============
 
-@api_router.get("/admin/orders", response_model=List[Order])
-async def get_all_orders(token: str, status: Optional[str] = None):
-    payload = decode_token(token)
+@api_router.get("/admin/orders")
+async def get_all_orders(status: Optional[str] = None, payload: dict = Depends(get_current_user)):
     if payload["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
@@ -370,12 +545,11 @@ async def get_all_orders(token: str, status: Optional[str] = None):
     if status:
         query["status"] = status
     
-    orders = await db.orders.find(query, {"_id": 0}).sort("timestamp", -1).to_list(1000)
-    return orders
+    cursor = db.orders.find(query, {"_id": 0, "items": 0}).sort("timestamp", -1)
+    return StreamingResponse(stream_json_array(cursor), media_type="application/json")
 
 @api_router.patch("/admin/orders/{order_id}/status")
-async def update_order_status(order_id: str, status_data: OrderStatusUpdate, token: str):
-    payload = decode_token(token)
+async def update_order_status(order_id: str, status_data: OrderStatusUpdate, payload: dict = Depends(get_current_user)):
     if payload["user_type"] not in ["admin", "delivery_person"]:
         raise HTTPException(status_code=403, detail="Unauthorized")
     
@@ -390,37 +564,38 @@ async def update_order_status(order_id: str, status_data: OrderStatusUpdate, tok
     return {"success": True, "message": "Order status updated"}
 
 @api_router.patch("/admin/orders/{order_id}/assign-delivery")
-async def assign_delivery_person(order_id: str, assignment: DeliveryAssignment, token: str):
-    payload = decode_token(token)
+async def assign_delivery_person(order_id: str, assignment: DeliveryAssignment, payload: dict = Depends(get_current_user)):
     if payload["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    # Get delivery person
+    # Get delivery person (name only — it's all the assignment records)
     delivery_person = await db.users.find_one(
         {"id": assignment.delivery_person_id, "user_type": "delivery_person"},
-        {"_id": 0}
+        {"_id": 0, "name": 1}
     )
-    
+
     if not delivery_person:
         raise HTTPException(status_code=404, detail="Delivery person not found")
-    
-    result = await db.orders.update_one(
+
+    # find_one_and_update matches-and-sets atomically, and unlike
+    # modified_count it doesn't report 404 when re-assigning the same person
+    updated = await db.orders.find_one_and_update(
         {"id": order_id},
         {"$set": {
             "delivery_person_id": assignment.delivery_person_id,
             "delivery_person_name": delivery_person["name"],
             "status": "Assigned"
-        }}
+        }},
+        projection={"_id": 0, "id": 1}
     )
-    
-    if result.modified_count == 0:
+
+    if not updated:
         raise HTTPException(status_code=404, detail="Order not found")
-    
+
     return {"success": True, "message": "Delivery person assigned"}
 
 @api_router.get("/admin/delivery-persons", response_model=List[User])
-async def get_delivery_persons(token: str):
-    payload = decode_token(token)
+async def get_delivery_persons(payload: dict = Depends(get_current_user)):
     if payload["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
@@ -432,21 +607,25 @@ async def get_delivery_persons(token: str):
     return delivery_persons
 
 @api_router.get("/admin/stats")
-async def get_stats(token: str):
-    payload = decode_token(token)
+async def get_stats(payload: dict = Depends(get_current_user)):
     if payload["user_type"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    total_orders = await db.orders.count_documents({})
-    total_revenue = 0
-    
-    orders = await db.orders.find({}, {"_id": 0, "total": 1}).to_list(10000)
-    for order in orders:
-        total_revenue += order["total"]
-    
-    total_customers = await db.users.count_documents({"user_type": "customer"})
-    total_items = await db.food_items.count_documents({"available": True})
-    
+    async def order_totals():
+        cursor = await db.orders.aggregate([
+            {"$group": {"_id": None, "total": {"$sum": "$total"}, "count": {"$sum": 1}}}
+        ])
+        return await cursor.to_list(1)
+
+    agg, total_customers, total_items = await asyncio.gather(
+        order_totals(),
+        db.users.count_documents({"user_type": "customer"}),
+        db.food_items.count_documents({"available": True})
+    )
+
+    total_orders = agg[0]["count"] if agg else 0
+    total_revenue = agg[0]["total"] if agg else 0
+
     return {
         "total_orders": total_orders,
         "total_revenue": round(total_revenue, 2),
@@ -456,24 +635,27 @@ async def get_stats(token: str):
 
 # ============ DELIVERY PERSON ROUTES ============
 
-@api_router.get("/delivery/my-orders", response_model=List[Order])
-async def get_delivery_orders(token: str):
-    payload = decode_token(token)
+@api_router.get("/delivery/my-orders")
+async def get_delivery_orders(payload: dict = Depends(get_current_user)):
     if payload["user_type"] != "delivery_person":
         raise HTTPException(status_code=403, detail="Delivery person access required")
     
-    orders = await db.orders.find(
+    cursor = db.orders.find(
         {"delivery_person_id": payload["user_id"]},
-        {"_id": 0}
-    ).sort("timestamp", -1).to_list(1000)
-    
-    return orders
+        {"_id": 0, "items": 0}
+    ).sort("timestamp", -1)
+
+    return StreamingResponse(stream_json_array(cursor), media_type="application/json")
 
 # ============ APP INITIALIZATION ============
 
 @app.on_event("startup")
 async def startup_event():
+    # Warm the connection pool so early requests skip the handshake
+    await asyncio.gather(*[db.command("ping") for _ in range(MONGO_MIN_POOL_SIZE)])
+    await ensure_indexes()
     await seed_data()
+    await refresh_categories_cache()
     logger.info("Application started and data seeded")
 
 app.include_router(api_router)
@@ -494,4 +676,4 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
+    await client.close()